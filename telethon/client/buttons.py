@@ -3,6 +3,15 @@ import typing
 from .. import utils, hints
 from ..tl import types, custom
 
+_KEYBOARD_BUTTON = 0xBAD74A3  # crc32(b'KeyboardButton')
+_NO_FLAGS = (None, None, None)  # resize, single_use, selective
+
+
+def _is_list_like(obj):
+    # Buttons are almost always given as lists, so check those
+    # by exact type before going through the general helper
+    return type(obj) in (list, tuple) or utils.is_list_like(obj)
+
 
 class ButtonMethods:
     @staticmethod
@@ -47,39 +56,37 @@ class ButtonMethods:
         except AttributeError:
             pass
 
-        if not utils.is_list_like(buttons):
+        if not _is_list_like(buttons):
             buttons = [[buttons]]
-        elif not buttons or not utils.is_list_like(buttons[0]):
+        elif not buttons or not _is_list_like(buttons[0]):
             buttons = [buttons]
 
         is_inline = False
         is_normal = False
-        resize = None
-        single_use = None
-        selective = None
+        markup_flags = _NO_FLAGS
 
         rows = []
         for row in buttons:
             current = []
             for button in row:
-                if isinstance(button, custom.Button):
-                    if button.resize is not None:
-                        resize = button.resize
-                    if button.single_use is not None:
-                        single_use = button.single_use
-                    if button.selective is not None:
-                        selective = button.selective
-
-                    button = button.button
-                elif isinstance(button, custom.MessageButton):
-                    button = button.button
+                if getattr(button, "SUBCLASS_OF_ID", None) != _KEYBOARD_BUTTON:
+                    # Either a custom.Button or a custom.MessageButton
+                    if isinstance(button, custom.Button):
+                        # The last non-None value of each markup flag wins
+                        flags = (button.resize, button.single_use, button.selective)
+                        if flags != _NO_FLAGS:
+                            markup_flags = tuple(
+                                old if new is None else new
+                                for old, new in zip(markup_flags, flags)
+                            )
+
+                    button = getattr(button, "button", button)
 
                 inline = custom.Button._is_inline(button)
                 is_inline |= inline
                 is_normal |= not inline
 
-                if button.SUBCLASS_OF_ID == 0xBAD74A3:
-                    # 0xbad74a3 == crc32(b'KeyboardButton')
+                if button.SUBCLASS_OF_ID == _KEYBOARD_BUTTON:
                     current.append(button)
 
             if current:
@@ -92,6 +99,7 @@ class ButtonMethods:
         elif is_inline:
             return types.ReplyInlineMarkup(rows)
         # elif is_normal:
+        resize, single_use, selective = markup_flags
         return types.ReplyKeyboardMarkup(
             rows, resize=resize, single_use=single_use, selective=selective
         )
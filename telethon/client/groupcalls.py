@@ -1,3 +1,4 @@
+import copy
 import datetime
 import typing
 
@@ -8,6 +9,9 @@ from .. import hints
 if typing.TYPE_CHECKING:
     from .telegramclient import TelegramClient
 
+# How many `get_group_call` results to keep, least recently used are evicted
+_MAX_CACHED_GROUP_CALLS = 32
+
 
 class GroupCallMethod:
     async def create_group_call(
@@ -102,12 +106,45 @@ class GroupCallMethod:
     async def get_group_call(
         self: "TelegramClient",
         call: types.TypeInputGroupCall,
-        limit: int,
+        limit: int = 0,
     ):
         """
         Get a Group Call.
 
+        If no participants are requested and the call was fetched the same
+        way before, the cached result is returned without making a request.
+        The cache is kept up-to-date with the :tl:`UpdateGroupCall` received,
+        so it's only used while the client is receiving updates, is cleared
+        whenever updates may have been missed (on disconnections and gaps),
+        and holds the most recently used calls only. Each call returns its
+        own deep copy of the result, so modifying it won't affect the cache.
+
         Args:
            call:
+           limit: Maximum amount of participants to fetch.
         """
-        return await self(functions.phone.GetGroupCallRequest(call=call, limit=limit))
+        call_id = getattr(call, "id", None)
+        use_cache = not limit and call_id is not None and not self._no_updates
+        if use_cache and call_id in self._group_call_cache:
+            self._group_call_cache.move_to_end(call_id)
+            return copy.deepcopy(self._group_call_cache[call_id])
+
+        result = await self(functions.phone.GetGroupCallRequest(call=call, limit=limit))
+        if use_cache:
+            # Only results without participants are cached, since
+            # the updates don't carry the full participant list
+            self._group_call_cache[call_id] = copy.deepcopy(result)
+            self._update_group_call_cache(result.call)
+            while len(self._group_call_cache) > _MAX_CACHED_GROUP_CALLS:
+                self._group_call_cache.popitem(last=False)
+        return result
+
+    def _update_group_call_cache(self: "TelegramClient", call):
+        cached = self._group_call_cache.get(call.id)
+        if cached is None:
+            return
+
+        if isinstance(call, types.GroupCallDiscarded):
+            del self._group_call_cache[call.id]
+        else:
+            cached.call = call
@@ -12,6 +12,13 @@ from telethon.errors.rpcerrorlist import FilePart0MissingError
 
 
 _MAX_CHUNK_SIZE = 100
+_REACTION_UPDATES = (types.UpdateMessageReactions, types.UpdateEditMessage)
+
+
+def _transcription_key(update):
+    # Partial results keep arriving until the transcription is final
+    return None if update.pending else update.transcription_id
+
 
 if typing.TYPE_CHECKING:
     from .telegramclient import TelegramClient
@@ -1715,17 +1722,60 @@ class MessageMethods:
         self: "TelegramClient",
         peer: "hints.EntityLike",
         message: "hints.MessageIDLike",
+        timeout: typing.Optional[float] = 60,
     ) -> typing.Optional[str]:
-        from .. import events
+        """
+        Transcribes a voice message or video note, waiting for the final
+        text if Telegram reports the transcription as still pending.
+
+        Waiting relies on :tl:`UpdateTranscribedAudio`, so the client
+        must be receiving updates for pending transcriptions to finish.
+
+        Arguments
+            peer (`entity`):
+                The chat where the message was sent.
+
+            message (`int` | `Message <telethon.tl.custom.message.Message>`):
+                The message to transcribe.
+
+            timeout (`float`, optional):
+                How long to wait for a pending transcription, in seconds.
+                `None` waits forever.
+
+        Returns
+            The transcribed text.
 
-        transcript_reult = await self(
+        Raises
+            ``asyncio.TimeoutError`` if the transcription is still pending
+            after `timeout` seconds. Telegram keeps transcribing it anyway,
+            so calling this method again later will return the text once
+            it's ready (or wait for it again). Nothing is left waiting for
+            the update after the timeout.
+
+        Example
+            .. code-block:: python
+
+                try:
+                    text = await client.transcribe(chat, message, timeout=30)
+                except asyncio.TimeoutError:
+                    text = None  # still pending, try again later
+        """
+        result = await self(
             functions.messages.TranscribeAudioRequest(
                 peer,
                 utils.get_message_id(message),
             )
         )
-
-        return transcript_result.text
+        if not result.pending:
+            return result.text
+
+        update = await self._update_waiter.wait(
+            types.UpdateTranscribedAudio,
+            _transcription_key,
+            result.transcription_id,
+            timeout,
+        )
+        return update.text
 
     async def set_emoji_status(
         self: "TelegramClient",
@@ -1806,17 +1856,21 @@ class MessageMethods:
             ),
         )
         for update in result.updates:
-            if isinstance(update, types.UpdateMessageReactions):
-                return update.reactions
-            if isinstance(update, types.UpdateEditMessage):
+            if isinstance(update, _REACTION_UPDATES):
+                if type(update) is types.UpdateMessageReactions:
+                    return update.reactions
                 return update.message.reactions
 
     async def set_quick_reaction(
         self: "TelegramClient",
         reaction: "hints.Reaction",
     ):
-        return await functions.messages.SetDefaultReactionRequest(
-            reaction=utils.convert_reaction(reaction),
+        # `convert_reaction` returns a list, but only one reaction can be set
+        reaction = utils.convert_reaction(reaction)
+        return await self(
+            functions.messages.SetDefaultReactionRequest(
+                reaction=reaction[0] if reaction else types.ReactionEmpty(),
+            )
         )
 
     '''
@@ -12,6 +12,7 @@ import pathlib
 from .. import version, helpers, __name__ as __base_name__
 from ..crypto import rsa
 from ..extensions import markdown
+from ..extensions.update_waiter import UpdateWaiter
 from ..network import MTProtoSender, Connection, ConnectionTcpFull, TcpMTProxy
 from ..sessions import Session, SQLiteSession, MemorySession
 from ..tl import functions, types
@@ -434,6 +435,13 @@ class TelegramBaseClient(abc.ABC):
         # {chat_id: {Conversation}}
         self._conversations = collections.defaultdict(set)
 
+        # Futures for callers waiting on specific updates (e.g. `transcribe`)
+        self._update_waiter = UpdateWaiter(self)
+
+        # {call_id: phone.GroupCall} fetched by `get_group_call`, kept
+        # up-to-date with the calls received in `UpdateGroupCall`
+        self._group_call_cache = collections.OrderedDict()
+
         # Hack to workaround the fact Telegram may send album updates as
         # different Updates when being sent from a different data center.
         # {grouped_id: AlbumHack}
@@ -799,6 +807,8 @@ class TelegramBaseClient(abc.ABC):
             updates_handle=self._updates_handle,
             keepalive_handle=self._keepalive_handle,
         )
+        # Nothing keeps the cached group calls up-to-date while disconnected
+        self._group_call_cache.clear()
 
     async def _switch_dc(self: "TelegramClient", new_dc):
         """
@@ -120,7 +120,7 @@ class TopicMethods:
     async def get_topics(
         self: "TelegramClient",
         entity: "hints.EntityLike",
-        topic_id: typing.List[int] = None,
+        topic_id: typing.Union[int, typing.List[int]] = None,
         offset_date: typing.Optional[datetime.datetime] = None,
         offset_id: int = 0,
         offset_topic: int = 0,
@@ -135,8 +135,8 @@ class TopicMethods:
             entity (`entity`):
                 The channel where the forum topics should be retrieved.
 
-            topic_id (`int`, optional):
-                specific topic_id to get.
+            topic_id (`int` | `list`, optional):
+                The ID or IDs of specific topics to get.
 
             query (`str`, optional):
                 The query to search for.
@@ -173,9 +173,12 @@ class TopicMethods:
                     q=query,
                 )
             )
+
+        if isinstance(topic_id, int):
+            topic_id = (topic_id,)
         return await self(
             functions.channels.GetForumTopicsByIDRequest(
-                channel=channel, topics=topic_id
+                channel=entity, topics=topic_id
             )
         )
 
@@ -52,6 +52,9 @@ class UpdateMethods:
         self._no_updates = not receive_updates
         if receive_updates:
             await self(functions.updates.GetStateRequest())
+        else:
+            # Nothing would keep the cached calls up-to-date anymore
+            self._group_call_cache.clear()
 
     def run_until_disconnected(self: "TelegramClient"):
         """
@@ -311,6 +314,8 @@ class UpdateMethods:
 
                 get_diff = self._message_box.get_difference()
                 if get_diff:
+                    # Updates were missed, so cached group calls may be stale
+                    self._group_call_cache.clear()
                     self._log[__name__].debug("Getting difference for account updates")
                     try:
                         diff = await self(get_diff)
@@ -375,6 +380,7 @@ class UpdateMethods:
                     self._mb_entity_cache
                 )
                 if get_diff:
+                    self._group_call_cache.clear()
                     self._log[__name__].debug(
                         "Getting difference for channel %s updates",
                         get_diff.channel.channel_id,
@@ -523,6 +529,11 @@ class UpdateMethods:
         entities = {utils.get_peer_id(x): x for x in itertools.chain(users, chats)}
         for u in updates:
             u._entities = entities
+
+        if self._group_call_cache:
+            for u in updates:
+                if type(u) is types.UpdateGroupCall:
+                    self._update_group_call_cache(u.call)
         return updates
 
     async def _keepalive_loop(self: "TelegramClient"):
@@ -597,7 +608,9 @@ class UpdateMethods:
                 if conv._custom:
                     await conv._check_custom(built)
 
-        for builder, callback in self._event_builders:
+        # Iterate over a copy, since handlers (or `UpdateWaiter`) can be
+        # removed while awaiting, which would otherwise skip the next one
+        for builder, callback in self._event_builders[:]:
             event = built[type(builder)]
             if not event:
                 continue
@@ -640,7 +653,7 @@ class UpdateMethods:
         # We're duplicating a most logic from `_dispatch_update`, but all in
         # the name of speed; we don't want to make it worse for all updates
         # just because albums may need it.
-        for builder, callback in self._event_builders:
+        for builder, callback in self._event_builders[:]:
             if isinstance(builder, events.Raw):
                 continue
             if not isinstance(event, builder.Event):
@@ -678,6 +691,9 @@ class UpdateMethods:
                     self._log[__name__].exception("Unhandled exception on %s", name)
 
     async def _handle_auto_reconnect(self: "TelegramClient"):
+        # Updates sent while disconnected are lost without a catch-up
+        self._group_call_cache.clear()
+
         # TODO Catch-up
         # For now we make a high-level request to let Telegram
         # know we are still interested in receiving more updates.
@@ -15,13 +15,15 @@ class JoinRequest(EventBuilder):
 
     @classmethod
     def build(cls, update, _, __):
-        if isinstance(update, UpdateBotChatInviteRequester):
+        if update.CONSTRUCTOR_ID == UpdateBotChatInviteRequester.CONSTRUCTOR_ID:
             return cls.Event(update)
 
         # elif isinstance(update, MessageService) and isinstance(update.action, MessageActionChatJoinedByRequest):
         # return cls.Event(update, approved=True)
 
     class Event(EventCommon):
+        __slots__ = ("_user_id", "invite", "user_about")
+
         def __init__(self, update):
             super().__init__(chat_peer=update.peer)
             self._user_id = update.user_id
@@ -5,6 +5,15 @@ from ..tl import types
 from ..tl.functions.phone import ToggleGroupCallRecordRequest
 from .common import EventCommon, name_inner_event, EventBuilder
 
+_NEW_MESSAGE_IDS = {
+    types.UpdateNewMessage.CONSTRUCTOR_ID,
+    types.UpdateNewChannelMessage.CONSTRUCTOR_ID,
+}
+_GROUP_CALL_ACTIONS = {
+    types.MessageActionGroupCall.CONSTRUCTOR_ID: "call",
+    types.MessageActionGroupCallScheduled.CONSTRUCTOR_ID: "scheduled",
+}
+
 
 @name_inner_event
 class GroupCall(EventBuilder):
@@ -18,29 +27,37 @@ class GroupCall(EventBuilder):
 
     @classmethod
     def build(cls, update, _, __):
-        if isinstance(
-            update, (types.UpdateNewMessage, types.UpdateNewChannelMessage)
-        ) and isinstance(update.message, types.MessageService):
-            update = update.message
-            if isinstance(update.action, types.MessageActionGroupCall):
-                return cls.Event(update, duration=update.action.duration or 0)
-            elif isinstance(update.action, types.MessageActionGroupCallScheduled):
-                return cls.Event(update, scheduled=True)
+        if update.CONSTRUCTOR_ID not in _NEW_MESSAGE_IDS:
+            return
+
+        message = update.message
+        if message.CONSTRUCTOR_ID != types.MessageService.CONSTRUCTOR_ID:
+            return
+
+        kind = _GROUP_CALL_ACTIONS.get(message.action.CONSTRUCTOR_ID)
+        if kind == "call":
+            return cls.Event(message, duration=message.action.duration or 0)
+        elif kind == "scheduled":
+            return cls.Event(message, scheduled=True)
 
     class Event(EventCommon):
+        __slots__ = (
+            "_update",
+            "_input_call",
+            "_scheduled",
+            "duration",
+            "started",
+            "ended",
+        )
+
         def __init__(self, update, scheduled=None, duration=None):
             super().__init__(update.peer_id, update.id)
             self._update = update
             self._input_call = update.action.call
             self._scheduled = scheduled
             self.duration = duration
-            self.started = None
-            self.ended = None
-
-            if duration == 0:
-                self.started = True
-            elif duration != None:
-                self.ended = True
+            self.started = duration == 0
+            self.ended = duration is not None and duration != 0
 
         @property
         def input_call(self):
@@ -2,11 +2,9 @@
 This module contains the BinaryReader utility class.
 """
 
-import os
+import struct
 import time
 from datetime import datetime, timezone, timedelta
-from io import BytesIO
-from struct import unpack
 
 from ..errors import TypeNotFoundError
 from ..tl.alltlobjects import tlobjects
@@ -15,6 +13,24 @@ from ..tl.core import core_objects
 _EPOCH_NAIVE = datetime(*time.gmtime(0)[:6])
 _EPOCH = _EPOCH_NAIVE.replace(tzinfo=timezone.utc)
 
+# Pre-compiled formats so the hot readers don't re-parse them on every call
+_BYTE = struct.Struct("<B")
+_INT = struct.Struct("<i")
+_UINT = struct.Struct("<I")
+_LONG = struct.Struct("<q")
+_ULONG = struct.Struct("<Q")
+_FLOAT = struct.Struct("<f")
+_DOUBLE = struct.Struct("<d")
+
+# {format: struct.Struct} used by read_struct, filled as formats are seen
+_STRUCTS = {}
+
+# Constructor IDs that are parsed manually rather than through a TLObject
+_BOOL_TRUE = 0x997275B5
+_BOOL_FALSE = 0xBC799737
+_VECTOR = 0x1CB5C415
+_BOOL_MAP = {_BOOL_TRUE: True, _BOOL_FALSE: False}
+
 
 class BinaryReader:
     """
@@ -22,7 +38,9 @@ class BinaryReader:
     """
 
     def __init__(self, data):
-        self.stream = BytesIO(data)
+        self.stream = data
+        self.position = 0
+        self._mv = memoryview(data)
         self._last = None  # Should come in handy to spot -404 errors
 
     # region Reading
@@ -31,84 +49,179 @@ class BinaryReader:
     # https://core.telegram.org/mtproto
     def read_byte(self):
         """Reads a single byte value."""
-        return self.read(1)[0]
+        try:
+            (value,) = _BYTE.unpack_from(self.stream, self.position)
+        except struct.error:
+            raise self._out_of_data(1) from None
+        self.position += 1
+        return value
 
     def read_int(self, signed=True):
         """Reads an integer (4 bytes) value."""
-        return int.from_bytes(self.read(4), byteorder="little", signed=signed)
+        try:
+            (value,) = (_INT if signed else _UINT).unpack_from(
+                self.stream, self.position
+            )
+        except struct.error:
+            raise self._out_of_data(4) from None
+        self.position += 4
+        return value
 
     def read_long(self, signed=True):
         """Reads a long integer (8 bytes) value."""
-        return int.from_bytes(self.read(8), byteorder="little", signed=signed)
+        try:
+            (value,) = (_LONG if signed else _ULONG).unpack_from(
+                self.stream, self.position
+            )
+        except struct.error:
+            raise self._out_of_data(8) from None
+        self.position += 8
+        return value
 
     def read_float(self):
         """Reads a real floating point (4 bytes) value."""
-        return unpack("<f", self.read(4))[0]
+        try:
+            (value,) = _FLOAT.unpack_from(self.stream, self.position)
+        except struct.error:
+            raise self._out_of_data(4) from None
+        self.position += 4
+        return value
 
     def read_double(self):
         """Reads a real floating point (8 bytes) value."""
-        return unpack("<d", self.read(8))[0]
+        try:
+            (value,) = _DOUBLE.unpack_from(self.stream, self.position)
+        except struct.error:
+            raise self._out_of_data(8) from None
+        self.position += 8
+        return value
+
+    def read_struct(self, fmt):
+        """Reads several fixed-size values at once given their format."""
+        s = _STRUCTS.get(fmt)
+        if s is None:
+            s = _STRUCTS[fmt] = struct.Struct(fmt)
+
+        try:
+            values = s.unpack_from(self.stream, self.position)
+        except struct.error:
+            raise self._out_of_data(s.size) from None
+        self.position += s.size
+        return values
 
     def read_large_int(self, bits, signed=True):
         """Reads a n-bits long integer value."""
-        return int.from_bytes(self.read(bits // 8), byteorder="little", signed=signed)
+        length = bits // 8
+        pos = self.position
+        if pos + length > len(self.stream):
+            raise self._out_of_data(length)
+
+        self.position = pos + length
+        return int.from_bytes(
+            self._mv[pos : pos + length], byteorder="little", signed=signed
+        )
+
+    def read_int128(self, signed=True):
+        """Reads a 128-bits long integer value."""
+        pos = self.position
+        if pos + 16 > len(self.stream):
+            raise self._out_of_data(16)
+
+        self.position = pos + 16
+        return int.from_bytes(self._mv[pos : pos + 16], "little", signed=signed)
+
+    def read_int256(self, signed=True):
+        """Reads a 256-bits long integer value."""
+        pos = self.position
+        if pos + 32 > len(self.stream):
+            raise self._out_of_data(32)
+
+        self.position = pos + 32
+        return int.from_bytes(self._mv[pos : pos + 32], "little", signed=signed)
 
     def read(self, length=-1):
         """Read the given amount of bytes, or -1 to read all remaining."""
-        result = self.stream.read(length)
-        if (length >= 0) and (len(result) != length):
-            raise BufferError(
-                "No more data left to read (need {}, got {}: {}); last read {}".format(
-                    length, len(result), repr(result), repr(self._last)
-                )
-            )
+        pos = self.position
+        if length < 0:
+            result = self.stream[pos:]
+        else:
+            result = self.stream[pos : pos + length]
+            if len(result) != length:
+                raise self._out_of_data(length, result)
 
+        self.position = pos + len(result)
         self._last = result
         return result
 
+    def _out_of_data(self, length, result=None):
+        if result is None:
+            result = self.stream[self.position : self.position + length]
+
+        return BufferError(
+            "No more data left to read (need {}, got {}: {}); last read {}".format(
+                length, len(result), repr(result), repr(self._last)
+            )
+        )
+
     def get_bytes(self):
         """Gets the byte array representing the current buffer as a whole."""
-        return self.stream.getvalue()
+        return bytes(self.stream)
 
     # endregion
 
     # region Telegram custom reading
 
-    def tgread_bytes(self):
+    def _tgread_span(self):
         """
-        Reads a Telegram-encoded byte array, without the need of
-        specifying its length.
+        Skips over a Telegram-encoded byte array and returns
+        the ``(start, length)`` of its contents in the stream.
         """
         first_byte = self.read_byte()
         if first_byte == 254:
-            length = (
-                self.read_byte() | (self.read_byte() << 8) | (self.read_byte() << 16)
-            )
+            pos = self.position
+            if pos + 3 > len(self.stream):
+                raise self._out_of_data(3)
+
+            length = int.from_bytes(self._mv[pos : pos + 3], "little")
+            self.position = pos + 3
             padding = length % 4
         else:
             length = first_byte
             padding = (length + 1) % 4
 
-        data = self.read(length)
+        start = self.position
         if padding > 0:
             padding = 4 - padding
-            self.read(padding)
 
+        if start + length + padding > len(self.stream):
+            raise self._out_of_data(length + padding)
+
+        self.position = start + length + padding
+        return start, length
+
+    def tgread_bytes(self):
+        """
+        Reads a Telegram-encoded byte array, without the need of
+        specifying its length.
+        """
+        start, length = self._tgread_span()
+        data = self.stream[start : start + length]
+        self._last = data
         return data
 
     def tgread_string(self):
         """Reads a Telegram-encoded string."""
-        return str(self.tgread_bytes(), encoding="utf-8", errors="replace")
+        # Decode straight from the view to avoid an intermediate bytes copy
+        start, length = self._tgread_span()
+        return str(self._mv[start : start + length], encoding="utf-8", errors="replace")
 
     def tgread_bool(self):
         """Reads a Telegram boolean value."""
         value = self.read_int(signed=False)
-        if value == 0x997275B5:  # boolTrue
-            return True
-        elif value == 0xBC799737:  # boolFalse
-            return False
-        else:
+        result = _BOOL_MAP.get(value)
+        if result is None:
             raise RuntimeError("Invalid boolean code {}".format(hex(value)))
+        return result
 
     def tgread_date(self):
         """Reads and converts Unix time (used by Telegram)
@@ -120,59 +233,62 @@ class BinaryReader:
     def tgread_object(self):
         """Reads a Telegram object."""
         constructor_id = self.read_int(signed=False)
-        clazz = tlobjects.get(constructor_id, None)
+        _get = tlobjects.get
+        clazz = _get(constructor_id)
+        if clazz is not None:
+            return clazz.from_reader(self)
+
+        # The class was None, but there's still a
+        # chance of it being a manually parsed value like bool!
+        result = _BOOL_MAP.get(constructor_id)
+        if result is not None:
+            return result
+        elif constructor_id == _VECTOR:
+            read_object = self.tgread_object
+            return [read_object() for _ in range(self.read_int())]
+
+        clazz = core_objects.get(constructor_id)
         if clazz is None:
-            # The class was None, but there's still a
-            # chance of it being a manually parsed value like bool!
-            value = constructor_id
-            if value == 0x997275B5:  # boolTrue
-                return True
-            elif value == 0xBC799737:  # boolFalse
-                return False
-            elif value == 0x1CB5C415:  # Vector
-                return [self.tgread_object() for _ in range(self.read_int())]
-
-            clazz = core_objects.get(constructor_id, None)
-            if clazz is None:
-                # If there was still no luck, give up
-                self.seek(-4)  # Go back
-                pos = self.tell_position()
-                error = TypeNotFoundError(constructor_id, self.read())
-                self.set_position(pos)
-                raise error
+            # If there was still no luck, give up
+            self.position -= 4  # Go back
+            pos = self.position
+            error = TypeNotFoundError(constructor_id, self.read())
+            self.position = pos
+            raise error
 
         return clazz.from_reader(self)
 
     def tgread_vector(self):
         """Reads a vector (a list) of Telegram objects."""
-        if 0x1CB5C415 != self.read_int(signed=False):
+        if _VECTOR != self.read_int(signed=False):
             raise RuntimeError("Invalid constructor code, vector was expected")
 
         count = self.read_int()
-        return [self.tgread_object() for _ in range(count)]
+        read_object = self.tgread_object
+        return [read_object() for _ in range(count)]
 
     # endregion
 
     def close(self):
-        """Closes the reader, freeing the BytesIO stream."""
-        self.stream.close()
+        """Closes the reader. The underlying data is left untouched."""
+        self._mv.release()
 
     # region Position related
 
     def tell_position(self):
         """Tells the current position on the stream."""
-        return self.stream.tell()
+        return self.position
 
     def set_position(self, position):
         """Sets the current position on the stream."""
-        self.stream.seek(position)
+        self.position = position
 
     def seek(self, offset):
         """
         Seeks the stream position given an offset from the current position.
         The offset may be negative.
         """
-        self.stream.seek(offset, os.SEEK_CUR)
+        self.position += offset
 
     # endregion
 
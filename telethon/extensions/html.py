@@ -3,10 +3,10 @@ Simple HTML -> Telegram entity parser.
 """
 
 import re
-import struct
 from collections import deque
 from html import escape
 from html.parser import HTMLParser
+from operator import attrgetter
 from typing import Optional, Tuple, List, Generator, List, Optional, cast
 from abc import ABC, abstractmethod
 
@@ -29,90 +29,86 @@ from ..tl.types import (
 )
 
 
-# Helpers from markdown.py
-def _add_surrogate(text):
-    return "".join(
-        "".join(chr(y) for y in struct.unpack("<HH", x.encode("utf-16le")))
-        if (0x10000 <= ord(x) <= 0x10FFFF)
-        else x
-        for x in text
-    )
-
-
-def _del_surrogate(text):
-    return text.encode("utf-16", "surrogatepass").decode("utf-16")
+# Tags which map to an entity without needing any attribute
+_SIMPLE_TAGS = {
+    "strong": MessageEntityBold,
+    "b": MessageEntityBold,
+    "em": MessageEntityItalic,
+    "i": MessageEntityItalic,
+    "tg-spoiler": MessageEntitySpoiler,
+    "u": MessageEntityUnderline,
+    "del": MessageEntityStrike,
+    "s": MessageEntityStrike,
+    "blockquote": MessageEntityBlockquote,
+}
 
 
 class HTMLToTelegramParser(HTMLParser):
     def __init__(self):
         super().__init__()
-        self.text = ""
+        self._text_parts = []
+        self._text_len = 0
         self.entities = []
         self._building_entities = {}
         self._open_tags = deque()
         self._open_tags_meta = deque()
 
+    @property
+    def text(self):
+        # The data is only joined once it's needed, as growing a string
+        # chunk by chunk may have to copy it all over again every time
+        return "".join(self._text_parts)
+
     def handle_starttag(self, tag, attrs):
         self._open_tags.appendleft(tag)
         self._open_tags_meta.appendleft(None)
 
         attrs = dict(attrs)
-        EntityType = None
+        EntityType = _SIMPLE_TAGS.get(tag)
         args = {}
-        if tag in {"strong", "b"}:
-            EntityType = MessageEntityBold
-        elif tag in {"em", "i"}:
-            EntityType = MessageEntityItalic
-        elif tag in {"tg-spoiler"}:
-            EntityType = MessageEntitySpoiler
-        elif tag == "u":
-            EntityType = MessageEntityUnderline
-        elif tag in {"del", "s"}:
-            EntityType = MessageEntityStrike
-        elif tag == "blockquote":
-            EntityType = MessageEntityBlockquote
-        elif tag == "code":
-            try:
-                # If we're in the middle of a <pre> tag, this <code> tag is
-                # probably intended for syntax highlighting.
-                #
-                # Syntax highlighting is set with
-                #     <code class='language-...'>codeblock</code>
-                # inside <pre> tags
-                pre = self._building_entities["pre"]
+        if EntityType is None:
+            if tag == "code":
+                try:
+                    # If we're in the middle of a <pre> tag, this <code> tag is
+                    # probably intended for syntax highlighting.
+                    #
+                    # Syntax highlighting is set with
+                    #     <code class='language-...'>codeblock</code>
+                    # inside <pre> tags
+                    pre = self._building_entities["pre"]
+                    try:
+                        pre.language = attrs["class"][len("language-") :]
+                    except KeyError:
+                        pass
+                except KeyError:
+                    EntityType = MessageEntityCode
+            elif tag == "pre":
+                EntityType = MessageEntityPre
+                args["language"] = ""
+            elif tag == "a":
                 try:
-                    pre.language = attrs["class"][len("language-") :]
+                    url = attrs["href"]
                 except KeyError:
-                    pass
-            except KeyError:
-                EntityType = MessageEntityCode
-        elif tag == "pre":
-            EntityType = MessageEntityPre
-            args["language"] = ""
-        elif tag == "a":
-            try:
-                url = attrs["href"]
-            except KeyError:
-                return
-            if url.startswith("mailto:"):
-                url = url[len("mailto:") :]
-                EntityType = MessageEntityEmail
-            else:
-                if self.get_starttag_text() == url:
-                    EntityType = MessageEntityUrl
+                    return
+                if url.startswith("mailto:"):
+                    url = url[len("mailto:") :]
+                    EntityType = MessageEntityEmail
                 else:
-                    EntityType = MessageEntityTextUrl
-                    args["url"] = _del_surrogate(url)
-                    url = None
-            self._open_tags_meta.popleft()
-            self._open_tags_meta.appendleft(url)
-        elif tag == "emoji" and CUSTOM_EMOJIS:
-            EntityType = MessageEntityCustomEmoji
-            args["document_id"] = int(attrs["document_id"])
+                    if self.get_starttag_text() == url:
+                        EntityType = MessageEntityUrl
+                    else:
+                        EntityType = MessageEntityTextUrl
+                        args["url"] = helpers.del_surrogate(url)
+                        url = None
+                self._open_tags_meta.popleft()
+                self._open_tags_meta.appendleft(url)
+            elif tag == "emoji" and CUSTOM_EMOJIS:
+                EntityType = MessageEntityCustomEmoji
+                args["document_id"] = int(attrs["document_id"])
 
         if EntityType and tag not in self._building_entities:
             self._building_entities[tag] = EntityType(
-                offset=len(self.text),
+                offset=self._text_len,
                 # The length will be determined when closing the tag.
                 length=0,
                 **args,
@@ -125,10 +121,8 @@ class HTMLToTelegramParser(HTMLParser):
             if url:
                 text = url
 
-        for tag, entity in self._building_entities.items():
-            entity.length += len(text)
-
-        self.text += text
+        self._text_parts.append(text)
+        self._text_len += len(text)
 
     def handle_endtag(self, tag):
         try:
@@ -138,6 +132,7 @@ class HTMLToTelegramParser(HTMLParser):
             pass
         entity = self._building_entities.pop(tag, None)
         if entity:
+            entity.length = self._text_len - entity.offset
             self.entities.append(entity)
 
 
@@ -153,13 +148,27 @@ def parse(html: str) -> Tuple[str, List[TypeMessageEntity]]:
         return html, []
 
     parser = HTMLToTelegramParser()
-    parser.feed(_add_surrogate(html))
+    parser.feed(helpers.add_surrogate(html))
     text = helpers.strip_text(parser.text, parser.entities)
-    return _del_surrogate(text), parser.entities
+    return helpers.del_surrogate(text), parser.entities
 
 
 CUSTOM_EMOJIS = True  # Can be disabled externally
 
+# Entities whose decoration method only needs the text
+_ENTITY_METHODS = {
+    MessageEntityBold: "bold",
+    MessageEntityItalic: "italic",
+    MessageEntitySpoiler: "spoiler",
+    MessageEntityCode: "code",
+    MessageEntityUnderline: "underline",
+    MessageEntityStrike: "strikethrough",
+    MessageEntityBlockquote: "blockquote",
+}
+
+# Formatting is not applied on top of an already-unparsed custom emoji
+_CUSTOM_EMOJI_RE = re.compile(r"^<emoji document_id=\"?\d+?\"?>[^<]*?<\/emoji>$")
+
 # Based on https://github.com/aiogram/aiogram/blob/c43ff9b6f9dd62cd2d84272e5c460b904b4c3276/aiogram/utils/text_decorations.py
 
 
@@ -171,35 +180,28 @@ class TextDecoration(ABC):
         :param text:
         :return:
         """
-        entity_map = {
-            MessageEntityBold: "bold",
-            MessageEntityItalic: "italic",
-            MessageEntitySpoiler: "spoiler",
-            MessageEntityCode: "code",
-            MessageEntityUnderline: "underline",
-            MessageEntityStrike: "strikethrough",
-            MessageEntityBlockquote: "blockquote",
-        }
-        if type(entity) in entity_map:
-            if re.match(r"^<emoji document_id=\"?\d+?\"?>[^<]*?<\/emoji>$", text):
+        entity_type = type(entity)
+        method = _ENTITY_METHODS.get(entity_type)
+        if method is not None:
+            if _CUSTOM_EMOJI_RE.match(text):
                 return text
 
-            return cast(str, getattr(self, entity_map[type(entity)])(value=text))
-        if type(entity) == MessageEntityPre:
+            return cast(str, getattr(self, method)(value=text))
+        if entity_type == MessageEntityPre:
             return (
                 self.pre_language(value=text, language=entity.language)
                 if entity.language
                 else self.pre(value=text)
             )
-        if type(entity) == MessageEntityMentionName:
+        if entity_type == MessageEntityMentionName:
             return self.link(value=text, link=f"tg://user?id={entity.user_id}")
-        if type(entity) == MessageEntityTextUrl:
+        if entity_type == MessageEntityTextUrl:
             return self.link(value=text, link=cast(str, entity.url))
-        if type(entity) == MessageEntityUrl:
+        if entity_type == MessageEntityUrl:
             return self.link(value=text, link=text)
-        if type(entity) == MessageEntityEmail:
+        if entity_type == MessageEntityEmail:
             return self.link(value=text, link=f"mailto:{text}")
-        if type(entity) == MessageEntityCustomEmoji and CUSTOM_EMOJIS:
+        if entity_type == MessageEntityCustomEmoji and CUSTOM_EMOJIS:
             return self.custom_emoji(value=text, document_id=entity.document_id)
 
         return self.quote(text)
@@ -214,7 +216,7 @@ class TextDecoration(ABC):
         return "".join(
             self._unparse_entities(
                 self._add_surrogates(text),
-                sorted(entities, key=lambda item: item.offset) if entities else [],
+                sorted(entities, key=attrgetter("offset")) if entities else [],
             )
         )
 
@@ -229,30 +231,49 @@ class TextDecoration(ABC):
             offset = 0
         length = length or len(text)
 
-        for index, entity in enumerate(entities):
+        # Walk the nested entities with an explicit stack rather than by
+        # recursing, so deeply nested messages can't hit the recursion limit.
+        # Each frame is [entities, next index, offset, length, parts, entity]
+        # and, once done, its parts are joined and applied as its entity.
+        root = []
+        stack = [[entities, 0, offset, length, root, None]]
+        while stack:
+            frame = stack[-1]
+            entities, index, offset, length, parts, _ = frame
+            if index == len(entities):
+                if offset < length:
+                    parts.append(
+                        self.quote(self._remove_surrogates(text[offset:length]))
+                    )
+                stack.pop()
+                if frame[5] is not None:
+                    stack[-1][4].append(self.apply_entity(frame[5], "".join(parts)))
+                continue
+
+            entity = entities[index]
+            frame[1] = index + 1
             if entity.offset * 2 < offset:
                 continue
             if entity.offset * 2 > offset:
-                yield self.quote(
-                    self._remove_surrogates(text[offset : entity.offset * 2])
+                parts.append(
+                    self.quote(
+                        self._remove_surrogates(text[offset : entity.offset * 2])
+                    )
                 )
             start = entity.offset * 2
-            offset = entity.offset * 2 + entity.length * 2
+            end = frame[2] = entity.offset * 2 + entity.length * 2
 
-            sub_entities = list(
-                filter(lambda e: e.offset * 2 < (offset or 0), entities[index + 1 :])
-            )
-            yield self.apply_entity(
-                entity,
-                "".join(
-                    self._unparse_entities(
-                        text, sub_entities, offset=start, length=offset
-                    )
-                ),
+            # Entities are sorted by offset, so the ones starting
+            # before this entity ends come right after it
+            sub_end = index + 1
+            while sub_end < len(entities) and entities[sub_end].offset * 2 < end:
+                sub_end += 1
+
+            stack.append(
+                [entities[index + 1 : sub_end], 0, start, end or len(text), [], entity]
             )
 
-        if offset < length:
-            yield self.quote(self._remove_surrogates(text[offset:length]))
+        yield from root
 
     @staticmethod
     def _add_surrogates(text: str):
@@ -339,7 +360,10 @@ class HtmlDecoration(TextDecoration):
         return f"<blockquote>{value}</blockquote>"
 
     def quote(self, value: str) -> str:
-        return escape(value, quote=False)
+        # Most text has nothing to escape, and checking is much cheaper
+        if "&" in value or "<" in value or ">" in value:
+            return escape(value, quote=False)
+        return value
 
     def custom_emoji(self, value: str, document_id: str) -> str:
         return f"<emoji document_id={document_id}>{value}</emoji>"
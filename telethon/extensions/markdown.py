@@ -4,10 +4,12 @@ for use within the library, which attempts to handle emojies correctly,
 since they seem to count as two characters and it's a bit strange.
 """
 
+import functools
+import operator
 import re
 import warnings
 
-from ..helpers import add_surrogate, del_surrogate, within_surrogate, strip_text
+from ..helpers import add_surrogate, del_surrogate
 from ..tl import TLObject
 from ..tl.types import (
     MessageEntityBold,
@@ -34,10 +36,58 @@ DEFAULT_DELIMITERS = {
 }
 REVERSE_DELIMITERS = {v: k for k, v in DEFAULT_DELIMITERS.items()}
 
+
+# {entity type: function returning the opening markup given the delimiter}
+# for the entities whose opening markup carries more than their delimiter
+_OPENING_FORMATTERS = {
+    MessageEntityPre: lambda e, d: f"{d}{e.language}\n" if e.language else d,
+}
+
+# {entity type: function returning the URL to use for it in inline links}
+_URL_BUILDERS = {
+    MessageEntityTextUrl: lambda e: e.url,
+    MessageEntityMentionName: lambda e: "tg://user?id={}".format(e.user_id),
+    MessageEntitySpoiler: lambda e: "spoiler",
+    MessageEntityCustomEmoji: lambda e: f"emoji/{e.document_id}",
+}
+
+# Global inline flags such as "(?i)" must be at the very start of a pattern
+_INLINE_FLAGS_RE = re.compile(r"^\(\?[aiLmsux]+\)")
+
+
+@functools.lru_cache(maxsize=8)
+def _build_markup_re(delimiters, url_pattern, url_flags):
+    # Build a regex to efficiently find all delimiters and URLs at once.
+    # Delimiters go first so they win over URLs starting at the same place.
+    # Note that the largest delimiter should go first, we don't
+    # want ``` to be interpreted as a single back-tick in a code block.
+    #
+    # The URL's own groups become the third and fourth ones. Its inline
+    # flags are already part of `url_flags`, and can't be kept mid-pattern.
+    return re.compile(
+        "(?P<delim>{})|(?P<url>{})".format(
+            "|".join(re.escape(k) for k in sorted(delimiters, key=len, reverse=True)),
+            _INLINE_FLAGS_RE.sub("", url_pattern),
+        ),
+        url_flags,
+    )
+
+
+# Entities whose content is kept verbatim, without nested markup
+_CODE_ENTITIES = frozenset((MessageEntityCode, MessageEntityPre))
+
 DEFAULT_URL_RE = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
 DEFAULT_URL_FORMAT = "[{0}]({1})"
 
 
+# Characters outside the Basic Multilingual Plane (need surrogates in UTF-16)
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def _utf16_len(text):
+    return len(text.encode("utf-16-le", "surrogatepass")) >> 1
+
+
 def overlap(a, b, x, y):
     return max(a, x) < min(b, y)
 
@@ -65,123 +115,150 @@ def parse(message, delimiters=None, url_re=None):
             return message, []
         delimiters = DEFAULT_DELIMITERS
 
-    # Build a regex to efficiently test all delimiters at once.
-    # Note that the largest delimiter should go first, we don't
-    # want ``` to be interpreted as a single back-tick in a code block.
-    delim_re = re.compile(
-        "|".join(
-            "({})".format(re.escape(k))
-            for k in sorted(delimiters, key=len, reverse=True)
-        )
-    )
-
-    # Cannot use a for loop because we need to skip some indices
-    i = 0
+    # Keyed on the delimiters themselves so that changes made
+    # to the dictionary (even the default one) are picked up
+    markup_re = _build_markup_re(frozenset(delimiters), url_re.pattern, url_re.flags)
+
+    # Telegram offsets are measured in UTF-16 code units, so rather than
+    # converting the whole text into surrogates, measure each slice that
+    # makes it into the clean message (`text` indices are still `str` ones).
+    # Most messages have no characters outside the BMP, which makes both
+    # lengths the same.
+    text = message
+    utf16_len = _utf16_len if _ASTRAL_RE.search(text) else len
+
+    # The clean message is built by appending the slices in between the
+    # markup, so `clean_len` is always the offset of the next character.
+    out = []
+    clean_len = 0
+    cursor = 0  # index in `text` up to which everything was handled
+    pos = 0  # index in `text` from which to look for more markup
+    # Entities are only created once their final position is known, so
+    # until then they're kept as [type, offset, length, (other arguments)]
     result = []
+    pending = []  # [(closing index, delimiter, result item)] of open entities
+
+    # Locals for what the loop below calls once or more per match
+    search = markup_re.search
+    find = text.find
+    append = out.append
+
+    # The regex only ever moves forward, so remember its next match
+    # instead of searching the same span of text over and over again.
+    m = search(text)
+    while True:
+        if m is not None and m.start() < pos:
+            m = search(text, pos)
+
+        # Closing an open entity takes precedence over anything it overlaps.
+        # Closing indices are never shared, so tuples compare by them alone.
+        closing = min(pending) if pending else None
+        if closing is not None and (m is None or closing[0] < m.end()):
+            pending.remove(closing)
+            end, delim, item = closing
+            piece = text[cursor:end]
+            append(piece)
+            clean_len += utf16_len(piece)
+            item[2] = clean_len - item[1]
+            cursor = pos = end + len(delim)
+            continue
+
+        if m is None:
+            break
+
+        if m.lastgroup == "delim":
+            delim = m.group()
+
+            # +1 to avoid matching right after (e.g. "****"), and skip
+            # over the closing delimiters that other entities already use
+            end = find(delim, m.end() + 1)
+            while end != -1 and any(
+                end < p[0] + len(p[1]) and p[0] < end + len(delim) for p in pending
+            ):
+                end = find(delim, end + 1)
+
+            ent = delimiters[delim]
+            is_code = ent in _CODE_ENTITIES
+            if end == -1 or (is_code and closing is not None and closing[0] < end):
+                # Unclosed, or a code block (which can't contain other
+                # entities) that would overlap with the end of another
+                pos = m.start() + 1
+                continue
 
-    # Work on byte level with the utf-16le encoding to get the offsets right.
-    # The offset will just be half the index we're at.
-    message = add_surrogate(message)
-    while i < len(message):
-        m = delim_re.match(message, pos=i)
-
-        # Did we find some delimiter here at `i`?
-        if m:
-            delim = next(filter(None, m.groups()))
-
-            # +1 to avoid matching right after (e.g. "****")
-            end = message.find(delim, i + len(delim) + 1)
-
-            # Did we find the earliest closing tag?
-            if end != -1:
-                # Remove the delimiter from the string
-                message = "".join(
-                    (
-                        message[:i],
-                        message[i + len(delim) : end],
-                        message[end + len(delim) :],
-                    )
-                )
+            piece = text[cursor : m.start()]
+            append(piece)
+            clean_len += utf16_len(piece)
 
-                # Check other affected entities
-                for ent in result:
-                    # If the end is after our start, it is affected
-                    if ent.offset + ent.length > i:
-                        # If the old start is also before ours, it is fully enclosed
-                        if ent.offset <= i:
-                            ent.length -= len(delim) * 2
-                        else:
-                            ent.length -= len(delim)
-
-                # Append the found entity
-                ent = delimiters[delim]
+            if is_code:
+                # No nested entities inside code blocks
+                content = text[m.end() : end]
                 if ent == MessageEntityPre:
                     lang = ""
-                    lang_index = message.find("\n", i, end - len(delim))
-                    m_len = end - len(delim) - lang_index
-                    if lang_index != -1 and m_len > 1:  # must have some message
-                        lang = message[i:lang_index]
-                        message = "".join(
-                            (
-                                message[:i],
-                                message[lang_index + 1 : end - len(delim)],
-                                message[end - len(delim) :],
-                            )
-                        )
-
-                    m_len = end - i - len(delim) if not lang else m_len
-                    result.append(ent(i, m_len, lang))  # has lang
-                    i = end - len(delim) - (len(lang) + 1) if lang else end - len(delim)
-                    continue
+                    lang_index = content.find("\n")
+                    if lang_index != -1 and len(content) - lang_index > 1:
+                        # must have some message after the language
+                        lang = content[:lang_index]
+                        content = content[lang_index + 1 :]
+                    result.append([ent, clean_len, utf16_len(content), (lang,)])
                 else:
-                    result.append(ent(i, end - i - len(delim)))
-
-                # No nested entities inside code blocks
-                if ent in (MessageEntityCode, MessageEntityPre):
-                    i = end - len(delim)
+                    result.append([ent, clean_len, utf16_len(content), ()])
+
+                append(content)
+                clean_len += utf16_len(content)
+                cursor = pos = end + len(delim)
+            else:
+                item = [ent, clean_len, 0, ()]
+                result.append(item)
+                pending.append((end, delim, item))
+                cursor = pos = m.end()
+        else:
+            piece = text[cursor : m.start()]
+            append(piece)
+            clean_len += utf16_len(piece)
+
+            # Replace the whole match with only the inline URL text.
+            _offset = clean_len
+            _length = utf16_len(m.group(3))
+            _url = m.group(4)
+            if _url == "spoiler":
+                result.append([MessageEntitySpoiler, _offset, _length, ()])
+            elif _url.startswith("emoji/"):
+                result.append(
+                    [
+                        MessageEntityCustomEmoji,
+                        _offset,
+                        _length,
+                        (int(_url.split("/")[1]),),
+                    ]
+                )
+            else:
+                result.append([MessageEntityTextUrl, _offset, _length, (_url,)])
 
-                continue
+            append(m.group(3))
+            clean_len += _length
+            cursor = pos = m.end()
 
-        elif url_re:
-            m = url_re.match(message, pos=i)
-            if m:
-                # Replace the whole match with only the inline URL text.
-                message = "".join(
-                    (message[: m.start()], m.group(1), message[m.end() :])
-                )
+    piece = text[cursor:]
+    append(piece)
+    clean_len += utf16_len(piece)
+    message = "".join(out)
 
-                delim_size = m.end() - m.start() - len(m.group())
-                for ent in result:
-                    # If the end is after our start, it is affected
-                    if ent.offset + ent.length > m.start():
-                        ent.length -= delim_size
-
-                _offset = m.start()
-                _length = len(m.group(1))
-                _url = del_surrogate(m.group(2))
-                if _url == "spoiler":
-                    result.append(MessageEntitySpoiler(_offset, _length))
-                elif _url.startswith("emoji/"):
-                    result.append(
-                        MessageEntityCustomEmoji(
-                            _offset, _length, int(_url.split("/")[1])
-                        )
-                    )
-                else:
-                    result.append(
-                        MessageEntityTextUrl(
-                            offset=_offset,
-                            length=_length,
-                            url=_url,
-                        )
-                    )
-                i += len(m.group(1))
-                continue
+    # Same as `strip_text`, but the UTF-16 length of the clean message is
+    # already known, and whitespace (never outside the BMP) counts the same
+    # in both units, so the stripped text doesn't need measuring again.
+    text = message.lstrip()
+    left = len(message) - len(text)
+    message = text.rstrip()
+    clean_len -= left + len(text) - len(message)
 
-        i += 1
+    entities = []
+    for ent, offset, length, args in result:
+        start = max(offset - left, 0)
+        end = min(offset + length - left, clean_len)
+        if start < end:
+            entities.append(ent(start, end - start, *args))
 
-    message = strip_text(message, result)
-    return del_surrogate(message), result
+    return message, entities
 
 
 def unparse(text, entities, delimiters=None, url_fmt=None):
@@ -209,45 +286,48 @@ def unparse(text, entities, delimiters=None, url_fmt=None):
     if isinstance(entities, TLObject):
         entities = (entities,)
 
-    text = add_surrogate(text)
+    # Without characters outside the BMP, surrogates don't change anything
+    astral = _ASTRAL_RE.search(text) is not None
+    if astral:
+        text = add_surrogate(text)
+
     insert_at = []
+    count = len(entities)
     for i, entity in enumerate(entities):
         s = entity.offset
-        e = entity.offset + entity.length
+        e = s + entity.length
         e_type = type(entity)
         delimiter = delimiters.get(e_type, None)
         if delimiter:
-            s_delimiter = delimiter
-            if e_type == MessageEntityPre:
-                if lang := getattr(entity, "language", None):
-                    s_delimiter += f"{lang}\n"
-            insert_at.append((s, i, s_delimiter))
-            insert_at.append((e, len(entities) - i, delimiter))
+            opener = _OPENING_FORMATTERS.get(e_type)
+            insert_at.append((s, i, opener(entity, delimiter) if opener else delimiter))
+            insert_at.append((e, count - i, delimiter))
         else:
-            url = None
-            if e_type == MessageEntityTextUrl:
-                url = entity.url
-            elif e_type == MessageEntityMentionName:
-                url = "tg://user?id={}".format(entity.user_id)
-            elif e_type == MessageEntitySpoiler:
-                url = "spoiler"
-            elif e_type == MessageEntityCustomEmoji:
-                url = f"emoji/{entity.document_id}"
+            url_builder = _URL_BUILDERS.get(e_type)
+            url = url_builder(entity) if url_builder else None
             if url:
                 insert_at.append((s, i, "["))
-                insert_at.append((e, len(entities) - i, "]({})".format(url)))
-
-    insert_at.sort(key=lambda t: (t[0], t[1]))
-    while insert_at:
-        at, _, what = insert_at.pop()
-
-        # If we are in the middle of a surrogate nudge the position by -1.
-        # Otherwise we would end up with malformed text and fail to encode.
+                insert_at.append((e, count - i, "]({})".format(url)))
+
+    # Insert everything in a single forward pass over the text
+    # Only by position and order, insertion order breaks the remaining ties
+    insert_at.sort(key=operator.itemgetter(0, 1))
+    out = []
+    prev = 0
+    for at, _, what in insert_at:
+        # If we are in the middle of a surrogate pair (right before its low
+        # half) nudge the position by +1. Otherwise we would end up with
+        # malformed text and fail to encode.
         # For example of bad input: "Hi \ud83d\ude1c"
         # https://en.wikipedia.org/wiki/UTF-16#U+010000_to_U+10FFFF
-        while within_surrogate(text, at):
+        if astral and 0 < at < len(text) and "\udc00" <= text[at] <= "\udfff":
             at += 1
 
-        text = text[:at] + what + text[at:]
+        at = max(at, prev)
+        out.append(text[prev:at])
+        out.append(what)
+        prev = at
 
-    return del_surrogate(text)
+    out.append(text[prev:])
+    text = "".join(out)
+    return del_surrogate(text) if astral else text
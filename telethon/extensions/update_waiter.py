@@ -0,0 +1,74 @@
+import asyncio
+
+from .. import helpers
+
+
+class UpdateWaiter:
+    """
+    This class lets several callers wait for a specific update.
+
+    Rather than adding one event handler per caller, a single
+    `events.Raw <telethon.events.raw.Raw>` handler is registered per
+    update type while there is at least one caller waiting for it.
+    Incoming updates are turned into a key which is used to find and
+    resolve the matching future, so dispatch cost doesn't grow with
+    the amount of callers waiting.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        # {update_type: (handler, {key: [Future]})}
+        self._waiters = {}
+
+    async def wait(self, update_type, key_fn, key, timeout=None):
+        """
+        Waits until an update of the given type arrives for which
+        ``key_fn(update) == key``, and returns said update.
+
+        ``key_fn`` may return `None` for updates that should be ignored.
+        Only the ``key_fn`` of the first caller waiting for an update type
+        is used, so all callers for the same type should use the same one.
+        """
+        try:
+            _, futures = self._waiters[update_type]
+        except KeyError:
+            futures = {}
+            handler = self._make_handler(key_fn, futures)
+            self._waiters[update_type] = (handler, futures)
+
+            from .. import events
+
+            self._client.add_event_handler(handler, events.Raw(update_type))
+
+        fut = helpers.get_running_loop().create_future()
+        futures.setdefault(key, []).append(fut)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            # The handler pops the futures it resolves, so only
+            # a timed out or cancelled wait needs to remove its own
+            pending = futures.get(key)
+            if pending is not None and fut in pending:
+                pending.remove(fut)
+                if not pending:
+                    del futures[key]
+
+            # Several waiters resolved by the same update all see the map
+            # empty, and a newer registration may have replaced this one
+            entry = self._waiters.get(update_type)
+            if not futures and entry is not None and entry[1] is futures:
+                del self._waiters[update_type]
+                self._client.remove_event_handler(entry[0])
+
+    @staticmethod
+    def _make_handler(key_fn, futures):
+        async def handler(update):
+            key = key_fn(update)
+            if key is None:
+                return
+
+            for fut in futures.pop(key, ()):
+                if not fut.done():
+                    fut.set_result(update)
+
+        return handler
@@ -4,11 +4,11 @@ import asyncio
 import io
 import enum
 import os
-import struct
 import inspect
 import logging
 import functools
 import sys
+from array import array
 from pathlib import Path
 from hashlib import sha1
 
@@ -37,18 +37,28 @@ def ensure_parent_dir_exists(file_path):
         os.makedirs(parent, exist_ok=True)
 
 
+# `array("H")` holds native-endian 16-bit code units
+_UTF16_NATIVE = "utf-16-le" if sys.byteorder == "little" else "utf-16-be"
+
+
 def add_surrogate(text):
-    return "".join(
-        # SMP -> Surrogate Pairs (Telegram offsets are calculated with these).
-        # See https://en.wikipedia.org/wiki/Plane_(Unicode)#Overview for more.
-        "".join(chr(y) for y in struct.unpack("<HH", x.encode("utf-16le")))
-        if (0x10000 <= ord(x) <= 0x10FFFF)
-        else x
-        for x in text
-    )
+    # SMP -> Surrogate Pairs (Telegram offsets are calculated with these).
+    # See https://en.wikipedia.org/wiki/Plane_(Unicode)#Overview for more.
+    if text.isascii():
+        return text
+
+    units = text.encode(_UTF16_NATIVE, "surrogatepass")
+    if len(units) == 2 * len(text):
+        return text  # no character needed a surrogate pair
+
+    # Every UTF-16 code unit becomes one character of its own
+    return "".join(map(chr, array("H", units)))
 
 
 def del_surrogate(text):
+    if text.isascii():
+        return text
+
     return text.encode("utf-16", "surrogatepass").decode("utf-16")
 
 
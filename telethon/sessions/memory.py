@@ -29,6 +29,40 @@ class _SentFileType(Enum):
             raise ValueError("The cls must be either InputDocument/InputPhoto")
 
 
+# The values stored in the sent_files table for each input type
+_SENT_FILE_TYPE_VALUES = {
+    InputDocument: _SentFileType.DOCUMENT.value,
+    InputPhoto: _SentFileType.PHOTO.value,
+}
+
+
+def _sent_file_type_value(cls):
+    try:
+        return _SENT_FILE_TYPE_VALUES[cls]
+    except (KeyError, TypeError):
+        return _SentFileType.from_type(cls).value  # raises the usual error
+
+
+# hex(crc32(b'InputPeer', b'InputUser' and b'InputChannel'))
+_INPUT_SUBCLASS_IDS = frozenset((0xC91C90B6, 0xE669BF46, 0x40F202FD))
+
+
+def _bare_id_candidates(id):
+    """
+    Returns the marked ids that the bare ``id`` would have as a user, chat
+    and channel, the same ones `utils.get_peer_id` would return for them.
+    """
+    if id < 0:
+        # Already marked, let get_peer_id deal with it
+        return (
+            utils.get_peer_id(PeerUser(id)),
+            utils.get_peer_id(PeerChat(id)),
+            utils.get_peer_id(PeerChannel(id)),
+        )
+
+    return id, -id, -(1000000000000 + id)
+
+
 class MemorySession(Session):
     def __init__(self):
         super().__init__()
@@ -40,7 +74,7 @@ class MemorySession(Session):
         self._takeout_id = None
 
         self._files = {}
-        self._entities = set()
+        self._entities = {}  # {marked id: row}
         self._update_states = {}
 
     def set_dc(self, dc_id, server_address, port):
@@ -133,31 +167,26 @@ class MemorySession(Session):
             # This may be a list of users already for instance
             entities = tlo
         else:
-            entities = []
-            if hasattr(tlo, "user"):
-                entities.append(tlo.user)
-            if hasattr(tlo, "chat"):
-                entities.append(tlo.chat)
-            if hasattr(tlo, "chats") and utils.is_list_like(tlo.chats):
-                entities.extend(tlo.chats)
-            if hasattr(tlo, "users") and utils.is_list_like(tlo.users):
-                entities.extend(tlo.users)
-
-        rows = []  # Rows to add (id, hash, username, phone, name)
-        for e in entities:
-            row = self._entity_to_row(e)
-            if row:
-                rows.append(row)
-        return rows
+            entities = [getattr(tlo, "user", None), getattr(tlo, "chat", None)]
+            chats = getattr(tlo, "chats", None)
+            if utils.is_list_like(chats):
+                entities.extend(chats)
+            users = getattr(tlo, "users", None)
+            if utils.is_list_like(users):
+                entities.extend(users)
+
+        # Rows to add (id, hash, username, phone, name)
+        return [row for row in map(self._entity_to_row, entities) if row]
 
     def process_entities(self, tlo):
-        self._entities |= set(self._entities_to_rows(tlo))
+        # Newer rows replace older ones for the same entity
+        self._entities.update((row[0], row) for row in self._entities_to_rows(tlo))
 
     def get_entity_rows_by_phone(self, phone):
         try:
             return next(
                 (id, hash)
-                for id, hash, _, found_phone, _ in self._entities
+                for id, hash, _, found_phone, _ in self._entities.values()
                 if found_phone == phone
             )
         except StopIteration:
@@ -167,7 +196,7 @@ class MemorySession(Session):
         try:
             return next(
                 (id, hash)
-                for id, hash, found_username, _, _ in self._entities
+                for id, hash, found_username, _, _ in self._entities.values()
                 if found_username == username
             )
         except StopIteration:
@@ -177,38 +206,23 @@ class MemorySession(Session):
         try:
             return next(
                 (id, hash)
-                for id, hash, _, _, found_name in self._entities
+                for id, hash, _, _, found_name in self._entities.values()
                 if found_name == name
             )
         except StopIteration:
             pass
 
     def get_entity_rows_by_id(self, id, exact=True):
-        try:
-            if exact:
-                return next(
-                    (found_id, hash)
-                    for found_id, hash, _, _, _ in self._entities
-                    if found_id == id
-                )
-            else:
-                ids = (
-                    utils.get_peer_id(PeerUser(id)),
-                    utils.get_peer_id(PeerChat(id)),
-                    utils.get_peer_id(PeerChannel(id)),
-                )
-                return next(
-                    (found_id, hash)
-                    for found_id, hash, _, _, _ in self._entities
-                    if found_id in ids
-                )
-        except StopIteration:
-            pass
+        ids = (id,) if exact else _bare_id_candidates(id)
+
+        for found_id in ids:
+            row = self._entities.get(found_id)
+            if row:
+                return row[0], row[1]
 
     def get_input_entity(self, key):
         try:
-            if key.SUBCLASS_OF_ID in (0xC91C90B6, 0xE669BF46, 0x40F202FD):
-                # hex(crc32(b'InputPeer', b'InputUser' and b'InputChannel'))
+            if key.SUBCLASS_OF_ID in _INPUT_SUBCLASS_IDS:
                 # We already have an Input version, so nothing else required
                 return key
             # Try to early return if this key can be casted as input peer
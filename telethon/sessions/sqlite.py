@@ -3,10 +3,9 @@ import os
 import time
 
 from ..tl import types
-from .memory import MemorySession, _SentFileType
-from .. import utils
+from .memory import MemorySession, _bare_id_candidates, _sent_file_type_value
 from ..crypto import AuthKey
-from ..tl.types import InputPhoto, InputDocument, PeerUser, PeerChat, PeerChannel
+from ..tl.types import InputPhoto, InputDocument
 
 try:
     import sqlite3
@@ -17,7 +16,9 @@ except ImportError as e:
     sqlite3_err = type(e)
 
 EXTENSION = ".session"
-CURRENT_VERSION = 7  # database version
+CURRENT_VERSION = 8  # database version
+
+_UTC = datetime.timezone.utc
 
 
 class SQLiteSession(MemorySession):
@@ -27,15 +28,22 @@ class SQLiteSession(MemorySession):
 
     If you think the session has been compromised, close all the sessions
     through an official Telegram client to revoke the authorization.
+
+    With ``wal=True``, the database uses SQLite's write-ahead log, which
+    makes the frequent entity writes cheaper. The log lives in ``-wal`` and
+    ``-shm`` files next to the session until it's closed, so the session
+    file alone may be out of date while the client is running (or after
+    it exits without disconnecting). Avoid it on network filesystems.
     """
 
-    def __init__(self, session_id=None):
+    def __init__(self, session_id=None, *, wal=False):
         if sqlite3 is None:
             raise sqlite3_err
 
         super().__init__()
         self.filename = ":memory:"
         self.save_entities = True
+        self._wal = wal
 
         if session_id:
             self.filename = session_id
@@ -107,6 +115,7 @@ class SQLiteSession(MemorySession):
                     seq integer
                 )""",
             )
+            self._create_entity_indexes(c)
             c.execute("insert into version values (?)", (CURRENT_VERSION,))
             self._update_session_table()
             c.close()
@@ -160,13 +169,34 @@ class SQLiteSession(MemorySession):
         if old == 6:
             old += 1
             c.execute("alter table entities add column date integer")
+        if old == 7:
+            old += 1
+            self._create_entity_indexes(c)
 
         c.close()
 
     @staticmethod
     def _create_table(c, *definitions):
-        for definition in definitions:
-            c.execute("create table {}".format(definition))
+        # A single transaction, otherwise every table is committed by itself
+        c.executescript(
+            "begin;{}commit;".format(
+                "".join("create table {};".format(d) for d in definitions)
+            )
+        )
+
+    @staticmethod
+    def _create_entity_indexes(c):
+        # Entities are looked up by these when resolving input entities.
+        # Most have no username or phone, so they're left out of the index.
+        c.execute(
+            "create index if not exists entities_username on entities (username) "
+            "where username is not null"
+        )
+        c.execute(
+            "create index if not exists entities_phone on entities (phone) "
+            "where phone is not null"
+        )
+        c.execute("create index if not exists entities_name on entities (name)")
 
     # Data from sessions should be kept as properties
     # not to fetch the database every time we need it
@@ -217,7 +247,7 @@ class SQLiteSession(MemorySession):
         )
         if row:
             pts, qts, date, seq = row
-            date = datetime.datetime.fromtimestamp(date, tz=datetime.timezone.utc)
+            date = datetime.datetime.fromtimestamp(date, tz=_UTC)
             return types.updates.State(pts, qts, date, seq, unread_count=0)
 
     def set_update_state(self, entity_id, state):
@@ -236,21 +266,12 @@ class SQLiteSession(MemorySession):
             rows = c.execute(
                 "select id, pts, qts, date, seq from update_state"
             ).fetchall()
-            return (
-                (
-                    row[0],
-                    types.updates.State(
-                        pts=row[1],
-                        qts=row[2],
-                        date=datetime.datetime.fromtimestamp(
-                            row[3], tz=datetime.timezone.utc
-                        ),
-                        seq=row[4],
-                        unread_count=0,
-                    ),
-                )
-                for row in rows
-            )
+            fromtimestamp = datetime.datetime.fromtimestamp
+            State = types.updates.State
+            return [
+                (id, State(pts, qts, fromtimestamp(date, tz=_UTC), seq, 0))
+                for id, pts, qts, date, seq in rows
+            ]
         finally:
             c.close()
 
@@ -265,6 +286,14 @@ class SQLiteSession(MemorySession):
         """Asserts that the connection is open and returns a cursor"""
         if self._conn is None:
             self._conn = sqlite3.connect(self.filename, check_same_thread=False)
+            if self._wal and self.filename != ":memory:":
+                # Entities are written on most updates; with a write-ahead
+                # log, commits don't need to sync the whole database file
+                try:
+                    self._conn.execute("pragma journal_mode=wal")
+                    self._conn.execute("pragma synchronous=normal")
+                except sqlite3.OperationalError:
+                    pass  # e.g. read-only, keep the default journal
         return self._conn.cursor()
 
     def _execute(self, stmt, *values):
@@ -283,6 +312,11 @@ class SQLiteSession(MemorySession):
         if self.filename != ":memory:":
             if self._conn is not None:
                 self._conn.commit()
+                # Cheap unless the entity indexes' statistics went stale
+                try:
+                    self._conn.execute("pragma optimize")
+                except sqlite3.OperationalError:
+                    pass  # e.g. read-only, nothing to update then
                 self._conn.close()
                 self._conn = None
 
@@ -292,10 +326,17 @@ class SQLiteSession(MemorySession):
             return True
         try:
             os.remove(self.filename)
-            return True
         except OSError:
             return False
 
+        # Leftovers of the write-ahead log must not end up in a new session
+        for suffix in ("-wal", "-shm"):
+            try:
+                os.remove(self.filename + suffix)
+            except OSError:
+                pass
+        return True
+
     @classmethod
     def list_sessions(cls):
         """Lists all the sessions of the users who have ever connected
@@ -336,21 +377,24 @@ class SQLiteSession(MemorySession):
         c = self._cursor()
         try:
             results = c.execute(
-                "select id, hash, date from entities where username = ?", (username,)
+                "select id, hash from entities where username = ? "
+                "order by date desc, id desc",
+                (username,),
             ).fetchall()
 
             if not results:
                 return None
 
-            # If there is more than one result for the same username, evict the oldest one
+            # If there is more than one result for the same username,
+            # only keep it on the newest one
             if len(results) > 1:
-                results.sort(key=lambda t: t[2] or 0)
-                c.executemany(
-                    "update entities set username = null where id = ?",
-                    [(t[0],) for t in results[:-1]],
+                c.execute(
+                    "update entities set username = null "
+                    "where username = ? and id != ?",
+                    (username, results[0][0]),
                 )
 
-            return results[-1][0], results[-1][1]
+            return results[0]
         finally:
             c.close()
 
@@ -363,9 +407,7 @@ class SQLiteSession(MemorySession):
         else:
             return self._execute(
                 "select id, hash from entities where id in (?,?,?)",
-                utils.get_peer_id(PeerUser(id)),
-                utils.get_peer_id(PeerChat(id)),
-                utils.get_peer_id(PeerChannel(id)),
+                *_bare_id_candidates(id),
             )
 
     # File processing
@@ -376,7 +418,7 @@ class SQLiteSession(MemorySession):
             "where md5_digest = ? and file_size = ? and type = ?",
             md5_digest,
             file_size,
-            _SentFileType.from_type(cls).value,
+            _sent_file_type_value(cls),
         )
         if row:
             # Both allowed classes have (id, access_hash) as parameters
@@ -390,7 +432,7 @@ class SQLiteSession(MemorySession):
             "insert or replace into sent_files values (?,?,?,?,?)",
             md5_digest,
             file_size,
-            _SentFileType.from_type(type(instance)).value,
+            _sent_file_type_value(type(instance)),
             instance.id,
             instance.access_hash,
         )
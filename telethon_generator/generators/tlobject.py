@@ -379,8 +379,26 @@ def _write_to_bytes(tlobject, builder):
 def _write_from_reader(tlobject, builder):
     builder.writeln("@classmethod")
     builder.writeln("def from_reader(cls, reader):")
-    for arg in tlobject.args:
-        _write_arg_read_code(builder, arg, tlobject, name="_" + arg.name)
+    args = tlobject.args
+    i = 0
+    while i < len(args):
+        # Consecutive fixed-size arguments are read with a single unpack
+        j = i
+        while j < len(args) and _get_struct_format(args[j], tlobject):
+            j += 1
+
+        if j - i < 2:
+            _write_arg_read_code(builder, args[i], tlobject, name="_" + args[i].name)
+            i += 1
+            continue
+
+        run = args[i:j]
+        builder.writeln(
+            "{} = reader.read_struct({!r})",
+            ", ".join(a.name if a.flag_indicator else "_" + a.name for a in run),
+            "<" + "".join(_get_struct_format(a, tlobject) for a in run),
+        )
+        i = j
 
     builder.writeln(
         "return cls({})",
@@ -548,6 +566,32 @@ def _write_arg_to_bytes(builder, arg, tlobject, name=None):
     return True  # Something was written
 
 
+def _get_struct_format(arg, tlobject):
+    """
+    Returns the ``struct`` format character for the given argument if it
+    always has the same size and needs no conversion, or `None` otherwise.
+    """
+    if arg.flag or arg.is_vector or arg.generic_definition:
+        return None
+
+    if arg.flag_indicator:
+        return "i"
+
+    if "int" == arg.type:
+        # Same as in `_write_arg_read_code`, user IDs are read unsigned
+        if arg.name == "user_id" or (arg.name == "id" and tlobject.result == "User"):
+            return "I"
+        return "i"
+
+    if "long" == arg.type:
+        return "q"
+
+    if "double" == arg.type:
+        return "d"
+
+    return None
+
+
 def _write_arg_read_code(builder, arg, tlobject, name):
     """
     Writes the read code for the given argument, setting the
@@ -609,10 +653,10 @@ def _write_arg_read_code(builder, arg, tlobject, name):
         builder.writeln("{} = reader.read_long()", name)
 
     elif "int128" == arg.type:
-        builder.writeln("{} = reader.read_large_int(bits=128)", name)
+        builder.writeln("{} = reader.read_int128()", name)
 
     elif "int256" == arg.type:
-        builder.writeln("{} = reader.read_large_int(bits=256)", name)
+        builder.writeln("{} = reader.read_int256()", name)
 
     elif "double" == arg.type:
         builder.writeln("{} = reader.read_double()", name)
@@ -6,7 +6,9 @@ import pytest
 
 from telethon import TelegramClient
 from telethon.client import MessageMethods
+from telethon.tl.functions.messages import SetDefaultReactionRequest
 from telethon.tl.types import PeerChat, MessageMediaDocument, Message, MessageEntityBold
+from telethon.tl.types import ReactionEmoji
 
 
 @pytest.mark.asyncio
@@ -104,3 +106,25 @@ class TestMessageMethods:
                 nosound_video=None,
             )
             assert result == expected_result
+
+
+@pytest.mark.asyncio
+async def test_set_quick_reaction_sends_request():
+    sentinel = object()
+    sent = []
+
+    class MockedClient(TelegramClient):
+        # noinspection PyMissingConstructor
+        def __init__(self):
+            pass
+
+        async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+            sent.append(request)
+            return sentinel
+
+    client = MockedClient()
+    assert (await client.set_quick_reaction("👍")) == sentinel
+    assert len(sent) == 1
+    assert isinstance(sent[0], SetDefaultReactionRequest)
+    assert isinstance(sent[0].reaction, ReactionEmoji)
+    assert sent[0].reaction.emoticon == "👍"
@@ -78,3 +78,15 @@ def test_offset_at_emoji():
 
     assert markdown.parse(parsed) == (text, entities)
     assert markdown.unparse(text, entities) == parsed
+
+
+def test_url_inside_entity():
+    """
+    Test that an entity wrapping an inline URL only spans the URL's text.
+    """
+    text, entities = markdown.parse("**[link](https://example.com)** after")
+    assert text == "link after"
+    assert entities == [
+        MessageEntityBold(0, 4),
+        MessageEntityTextUrl(0, 4, url="https://example.com"),
+    ]
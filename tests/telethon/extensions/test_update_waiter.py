@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from telethon import TelegramClient
+from telethon.tl.types import UpdateTranscribedAudio
+
+
+def _key(update):
+    return update.transcription_id
+
+
+def _update(transcription_id, text="text"):
+    return UpdateTranscribedAudio(
+        peer=None, msg_id=1, transcription_id=transcription_id, text=text
+    )
+
+
+def _client():
+    client = TelegramClient(None, 1, "hash")
+    # Avoid `get_me` calls when dispatching, since there's no connection
+    client._mb_entity_cache.set_self_user(1, False, 0)
+    return client
+
+
+async def _start_waiting(client, key, timeout=None):
+    task = asyncio.ensure_future(
+        client._update_waiter.wait(UpdateTranscribedAudio, _key, key, timeout)
+    )
+    await asyncio.sleep(0)  # let it register
+    return task
+
+
+@pytest.mark.asyncio
+async def test_matching_update_resolves():
+    client = _client()
+    task = await _start_waiting(client, 1)
+    update = _update(1)
+    await client._dispatch_update(update)
+
+    assert await task is update
+
+
+@pytest.mark.asyncio
+async def test_other_key_stays_pending():
+    client = _client()
+    task = await _start_waiting(client, 1)
+    await client._dispatch_update(_update(2))
+    await asyncio.sleep(0)
+
+    assert not task.done()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_timeout():
+    client = _client()
+    with pytest.raises(asyncio.TimeoutError):
+        await client._update_waiter.wait(UpdateTranscribedAudio, _key, 1, 0.01)
+
+    assert not client._update_waiter._waiters
+
+
+@pytest.mark.asyncio
+async def test_cancel_removes_future():
+    client = _client()
+    task = await _start_waiting(client, 1)
+    other = await _start_waiting(client, 1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    _, futures = client._update_waiter._waiters[UpdateTranscribedAudio]
+    assert len(futures[1]) == 1
+
+    update = _update(1)
+    await client._dispatch_update(update)
+    assert await other is update
+
+
+@pytest.mark.asyncio
+async def test_handler_removed_after_last_waiter():
+    client = _client()
+    first = await _start_waiting(client, 1)
+    second = await _start_waiting(client, 2)
+    assert len(client._event_builders) == 1
+
+    await client._dispatch_update(_update(1))
+    await first
+    assert len(client._event_builders) == 1
+
+    await client._dispatch_update(_update(2))
+    await second
+    assert not client._event_builders
+    assert not client._update_waiter._waiters
+
+
+@pytest.mark.asyncio
+async def test_concurrent_waiters_same_key():
+    client = _client()
+    first = await _start_waiting(client, 1)
+    second = await _start_waiting(client, 1)
+
+    update = _update(1)
+    await client._dispatch_update(update)
+
+    assert await first is update
+    assert await second is update
+    assert not client._event_builders
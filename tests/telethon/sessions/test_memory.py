@@ -0,0 +1,14 @@
+import pytest
+
+from telethon import utils
+from telethon.sessions.memory import _bare_id_candidates
+from telethon.tl.types import PeerUser, PeerChat, PeerChannel
+
+
+@pytest.mark.parametrize("id", [0, 1, 123456789, 9999999999, 10000000000, 2**40, -5])
+def test_bare_id_candidates_match_get_peer_id(id):
+    assert _bare_id_candidates(id) == (
+        utils.get_peer_id(PeerUser(id)),
+        utils.get_peer_id(PeerChat(id)),
+        utils.get_peer_id(PeerChannel(id)),
+    )
@@ -0,0 +1,38 @@
+import pytest
+
+from telethon.sessions.sqlite import SQLiteSession, sqlite3
+
+
+pytestmark = pytest.mark.skipif(sqlite3 is None, reason="sqlite3 is not available")
+
+
+def _insert(session, *rows):
+    c = session._cursor()
+    try:
+        c.executemany("insert or replace into entities values (?,?,?,?,?,?)", rows)
+    finally:
+        c.close()
+
+
+def _usernames(session):
+    c = session._cursor()
+    try:
+        return c.execute("select id, username from entities order by id").fetchall()
+    finally:
+        c.close()
+
+
+def test_get_entity_rows_by_username_prefers_newest():
+    session = SQLiteSession()
+    _insert(session, (2, 20, "name", None, None, 100), (1, 10, "name", None, None, 200))
+
+    assert session.get_entity_rows_by_username("name") == (1, 10)
+    assert _usernames(session) == [(1, "name"), (2, None)]
+
+
+def test_get_entity_rows_by_username_breaks_date_ties_by_id():
+    session = SQLiteSession()
+    _insert(session, (1, 10, "name", None, None, 100), (2, 20, "name", None, None, 100))
+
+    assert session.get_entity_rows_by_username("name") == (2, 20)
+    assert _usernames(session) == [(1, None), (2, "name")]